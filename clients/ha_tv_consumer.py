@@ -15,14 +15,15 @@ Commands:
 """
 
 import asyncio
-import json
 import logging
 import os
 import sys
 import signal
+import threading
 from typing import Dict, List, Optional
 
 import aiohttp
+import orjson
 
 # Configuration
 HA_CONFIG_FILE = os.getenv("HA_CONFIG_FILE", "./data/ha_devices.json")
@@ -32,6 +33,7 @@ HA_URL = os.getenv("HA_URL", "http://homeassistant:8123")
 HA_TOKEN = os.getenv("HA_TOKEN", "your-ha-token")
 CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL", "60"))  # Check every 60 seconds
 POINTS_PER_CHECK = int(os.getenv("POINTS_PER_CHECK", "1"))  # Charge 1 point per check
+IDLE_BALANCE_REFRESH_CYCLES = 10  # While nothing plays, still re-read the balance every N cycles
 
 # Logging setup
 logging.basicConfig(
@@ -72,14 +74,18 @@ class DeviceManager:
     def __init__(self, config_file: str):
         self.config_file = config_file
         self.devices: Dict[str, DeviceConfig] = {}
+        # Last payload written to disk, so unchanged saves can be skipped
+        self._last_serialized: Optional[bytes] = None
+        # Serializes writers so concurrent saves can't interleave on the temp file
+        self._save_lock = threading.Lock()
         self.load_config()
     
     def load_config(self):
         """Load device configuration from file."""
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    data = json.load(f)
+                with open(self.config_file, 'rb') as f:
+                    data = orjson.loads(f.read())
                     for device_data in data.get("devices", []):
                         if "entity_id" not in device_data:
                             logger.warning(f"Skipping invalid device config (missing entity_id): {device_data}")
@@ -95,22 +101,40 @@ class DeviceManager:
                 logger.info(f"Loaded {len(self.devices)} devices from config")
             else:
                 os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Invalid JSON in config file {self.config_file}: {e}")
         except Exception as e:
             logger.error(f"Failed to load config from {self.config_file}: {e}")
     
     def save_config(self):
-        """Save device configuration to file."""
-        try:
-            data = {
-                "devices": [device.to_dict() for device in self.devices.values()]
-            }
-            with open(self.config_file, 'w') as f:
-                json.dump(data, f, indent=2)
-            logger.info(f"Saved {len(self.devices)} devices to config")
-        except Exception as e:
-            logger.error(f"Failed to save config: {e}")
+        """Save device configuration to file.
+
+        Writes to a temporary file and renames it over the config, so a crash
+        never leaves a half-written file behind.
+        """
+        with self._save_lock:
+            try:
+                data = {
+                    "devices": [device.to_dict() for device in self.devices.values()]
+                }
+                payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+                if payload == self._last_serialized:
+                    return
+                tmp_file = f"{self.config_file}.tmp"
+                try:
+                    with open(tmp_file, 'wb') as f:
+                        f.write(payload)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_file, self.config_file)
+                finally:
+                    # Only left behind when the write or rename failed
+                    if os.path.exists(tmp_file):
+                        os.unlink(tmp_file)
+                self._last_serialized = payload
+                logger.info(f"Saved {len(self.devices)} devices to config")
+            except Exception as e:
+                logger.error(f"Failed to save config: {e}")
     
     def add_device(self, entity_id: str, name: str):
         """Add a device to the configuration."""
@@ -132,27 +156,41 @@ class APIClient:
     def __init__(self, base_url: str, api_key: str):
         self.base_url = base_url
         self.api_key = api_key
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared keep-alive session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=8, keepalive_timeout=75),
+                timeout=aiohttp.ClientTimeout(total=10),
+                headers={"x-api-key": self.api_key}
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the shared session."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
     
     async def _request(self, method: str, path: str, params: Optional[dict] = None) -> Optional[dict]:
         """Make an HTTP request to the API."""
-        headers = {"x-api-key": self.api_key}
-        
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.request(
-                    method, 
-                    f"{self.base_url}{path}", 
-                    headers=headers, 
-                    params=params
-                ) as response:
-                    if response.status >= 400:
-                        text = await response.text()
-                        logger.warning(f"API {method} {path} failed: {response.status} {text}")
-                        return None
-                    
-                    if response.content_type == "application/json":
-                        return await response.json()
-                    return {}
+            session = await self._get_session()
+            async with session.request(
+                method, 
+                f"{self.base_url}{path}", 
+                params=params
+            ) as response:
+                if response.status >= 400:
+                    text = await response.text()
+                    logger.warning(f"API {method} {path} failed: {response.status} {text}")
+                    return None
+                
+                if response.content_type == "application/json":
+                    return await response.json()
+                return {}
         except Exception as e:
             logger.error(f"API request failed: {e}")
             return None
@@ -179,25 +217,42 @@ class HomeAssistantClient:
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json"
         }
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared keep-alive session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            # Enough connections to check every device concurrently
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=16, keepalive_timeout=75),
+                timeout=aiohttp.ClientTimeout(total=10),
+                headers=self.headers
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the shared session."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
     
     async def _request(self, method: str, path: str, data: Optional[dict] = None) -> Optional[dict]:
         """Make an HTTP request to Home Assistant API."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.request(
-                    method,
-                    f"{self.url}/api{path}",
-                    headers=self.headers,
-                    json=data
-                ) as response:
-                    if response.status >= 400:
-                        text = await response.text()
-                        logger.warning(f"HA API {method} {path} failed: {response.status} {text}")
-                        return None
-                    
-                    if response.content_type == "application/json":
-                        return await response.json()
-                    return {}
+            session = await self._get_session()
+            async with session.request(
+                method,
+                f"{self.url}/api{path}",
+                json=data
+            ) as response:
+                if response.status >= 400:
+                    text = await response.text()
+                    logger.warning(f"HA API {method} {path} failed: {response.status} {text}")
+                    return None
+                
+                if response.content_type == "application/json":
+                    return await response.json()
+                return {}
         except Exception as e:
             logger.error(f"HA API request failed: {e}")
             return None
@@ -237,7 +292,7 @@ class DeviceMonitor:
             return state.get("state") == "playing"
             
         except Exception as e:
-            logger.debug(f"Failed to get state for {self.config.name}: {e}")
+            logger.debug("Failed to get state for %s: %s", self.config.name, e)
             return False
     
     async def pause(self):
@@ -259,6 +314,10 @@ class HATVConsumer:
         self.ha_client = HomeAssistantClient(HA_URL, HA_TOKEN)
         self.monitors: List[DeviceMonitor] = []
         self.running = False
+        # Last balance read from the server; None when unknown
+        self._last_balance: Optional[int] = None
+        # Consecutive cycles in which no device was playing
+        self._idle_cycles = 0
     
     async def list_devices(self):
         """List available media player devices in Home Assistant."""
@@ -290,6 +349,8 @@ class HATVConsumer:
             
         except Exception as e:
             print(f"Error getting devices: {e}")
+        finally:
+            await self.ha_client.close()
     
     def add_device(self, entity_id: str):
         """Add a device to the configuration."""
@@ -299,6 +360,7 @@ class HATVConsumer:
         
         async def _add():
             state = await self.ha_client.get_state(entity_id)
+            await self.ha_client.close()
             if not state:
                 print(f"Device {entity_id} not found in Home Assistant.")
                 return
@@ -316,6 +378,32 @@ class HATVConsumer:
         else:
             print(f"Device {entity_id} not found.")
     
+    async def _pause_all(self):
+        """Pause all monitored devices concurrently."""
+        await asyncio.gather(*(monitor.pause() for monitor in self.monitors))
+    
+    def _needs_balance_check(self) -> bool:
+        """Whether this cycle must ask the server for the balance.
+
+        Idle cycles with a healthy balance skip the request; nothing will be charged.
+        """
+        if self._last_balance is None or not self._idle_cycles:
+            return True
+        if self._idle_cycles % IDLE_BALANCE_REFRESH_CYCLES == 0:
+            return True
+        return self._last_balance <= POINTS_PER_CHECK * len(self.monitors)
+    
+    @staticmethod
+    def _next_tick_delay(loop: asyncio.AbstractEventLoop, next_tick: float) -> tuple:
+        """Advance the fixed-period schedule; return (next_tick, seconds to wait)."""
+        next_tick += CHECK_INTERVAL
+        delay = next_tick - loop.time()
+        if delay <= 0:
+            # Running behind: skip the missed ticks instead of bursting to catch up
+            logger.warning("Monitoring cycle overran the check interval")
+            return loop.time(), 0
+        return next_tick, delay
+    
     async def run_monitoring(self):
         """Main monitoring loop - check devices and charge points."""
         if not self.device_manager.devices:
@@ -344,43 +432,55 @@ class HATVConsumer:
             loop.add_signal_handler(sig, signal_handler)
         
         try:
+            # Cycles start on fixed boundaries so the work time doesn't add drift
+            next_tick = loop.time()
             while not shutdown_event.is_set():
-                # Check balance first
-                balance = await self.api_client.get_balance()
-                logger.info(f"Current balance: {balance} points")
+                # Check balance first (skipped while idle with a healthy balance)
+                if self._needs_balance_check():
+                    self._last_balance = await self.api_client.get_balance()
+                    logger.info("Current balance: %s points", self._last_balance)
+                balance = self._last_balance
                 
                 if balance <= 0:
                     logger.warning("No balance! Pausing all devices...")
-                    for monitor in self.monitors:
-                        await monitor.pause()
+                    await self._pause_all()
                     # Wait with cancellation support
+                    next_tick, delay = self._next_tick_delay(loop, next_tick)
                     try:
-                        await asyncio.wait_for(shutdown_event.wait(), timeout=CHECK_INTERVAL)
+                        await asyncio.wait_for(shutdown_event.wait(), timeout=delay)
                         break
                     except asyncio.TimeoutError:
                         continue
                 
-                # Check each device
+                # Check all devices concurrently
+                results = await asyncio.gather(
+                    *(monitor.is_playing() for monitor in self.monitors),
+                    return_exceptions=True
+                )
                 playing_devices = []
-                for monitor in self.monitors:
-                    if await monitor.is_playing():
+                for monitor, result in zip(self.monitors, results):
+                    if isinstance(result, Exception):
+                        logger.warning("Check failed for %s: %s", monitor.config.name, result)
+                    elif result:
                         playing_devices.append(monitor.config.name)
                 
+                self._idle_cycles = 0 if playing_devices else self._idle_cycles + 1
+                
                 # Charge points for playing devices
                 if playing_devices:
                     total_charge = len(playing_devices) * POINTS_PER_CHECK
-                    logger.info(f"Playing devices: {', '.join(playing_devices)}")
+                    logger.info("Playing devices: %s", ", ".join(playing_devices))
                     
                     if await self.api_client.withdraw_points(total_charge):
-                        logger.info(f"Charged {total_charge} points")
+                        logger.info("Charged %s points", total_charge)
                     else:
                         logger.warning("Failed to charge points - pausing all devices")
-                        for monitor in self.monitors:
-                            await monitor.pause()
+                        await self._pause_all()
                 
                 # Wait with cancellation support
+                next_tick, delay = self._next_tick_delay(loop, next_tick)
                 try:
-                    await asyncio.wait_for(shutdown_event.wait(), timeout=CHECK_INTERVAL)
+                    await asyncio.wait_for(shutdown_event.wait(), timeout=delay)
                     break
                 except asyncio.TimeoutError:
                     pass
@@ -389,6 +489,8 @@ class HATVConsumer:
             logger.info("Interrupted by user")
         finally:
             logger.info("Shutting down...")
+            await self.api_client.close()
+            await self.ha_client.close()
 
 
 def main():
@@ -7,20 +7,26 @@ through Telegram commands.
 """
 
 import os
+import sys
 import asyncio
+import hashlib
 import logging
+from time import monotonic, perf_counter, time as unix_time
 import httpx
-from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, Any, List
-from collections import defaultdict
+import orjson
+from datetime import datetime, time, timedelta, timezone
+from typing import Optional, Dict, Any, List, Iterator, Awaitable, Callable, Union, Set, Sequence
+from functools import lru_cache, wraps
 from telegram import Update, BotCommand
 from telegram.ext import (
+    AIORateLimiter,
     Application, 
     CommandHandler, 
     ContextTypes, 
     MessageHandler,
     filters
 )
+from telegram.request import HTTPXRequest
 
 # Configure logging
 logging.basicConfig(
@@ -33,55 +39,112 @@ logger = logging.getLogger(__name__)
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 SERVER_URL = os.getenv("SERVER_URL", "http://localhost:8000")
 API_KEY = os.getenv("API_KEY", "your-secret-api-key-123")
+# Webhook mode (optional): when WEBHOOK_URL is set the bot receives updates via
+# webhook instead of long-polling. TLS is expected to terminate at a reverse proxy.
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+# An empty value (e.g. from docker-compose's default) means "no secret"; PTB
+# only skips the secret check for None and would reject every update otherwise.
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or None
+COMMANDS_HASH_FILE = os.getenv(
+    "COMMANDS_HASH_FILE",
+    os.path.join(os.path.expanduser("~"), ".cache", "fitness_bot", "cmds.hash")
+)
+
+# Balance cache (stale-while-revalidate), in seconds
+BALANCE_CACHE_MAX_AGE = 2.0
+BALANCE_CACHE_STALE_WINDOW = 15.0
+
+# Daily summary cache lifetime for bursts of /status calls, in seconds
+DAILY_SUMMARY_CACHE_TTL = 15.0
+
+# Page size and page cap for summing a day's transactions on servers
+# without /transactions/summary
+SUMMARY_FALLBACK_PAGE_SIZE = 100
+SUMMARY_FALLBACK_MAX_PAGES = 50
+
+# Handlers slower than this are logged, in seconds
+SLOW_HANDLER_THRESHOLD = 0.5
 
 if not TELEGRAM_BOT_TOKEN:
     raise ValueError("TELEGRAM_BOT_TOKEN environment variable is required")
 
+# Telegram rejects messages over 4096 characters; keep some headroom
+MAX_MESSAGE_LENGTH = 4000
+
 # GMT+3 timezone
 GMT_PLUS_3 = timezone(timedelta(hours=3))
 
-def format_datetime_for_user(dt_str: str, format_type: str = 'full') -> str:
+# strftime templates for the supported display formats
+_DATETIME_FORMATS = {
+    'full': '%Y-%m-%d %H:%M:%S GMT+3',
+    'short': '%m/%d %H:%M',
+    'time': '%H:%M:%S',
+}
+
+@lru_cache(maxsize=1024)
+def format_datetime_for_user(dt_str: Union[str, int, float], format_type: str = 'full') -> str:
     """
     Format datetime string for user display in GMT+3 timezone.
     
+    Results are memoized since the same timestamps are rendered repeatedly
+    across /balance, /status and /transactions.
+    
     Args:
-        dt_str: ISO format datetime string or timestamp
+        dt_str: ISO format datetime string or epoch timestamp (number or digit string)
         format_type: 'full' for full datetime, 'short' for MM/DD HH:MM, 'time' for HH:MM:SS
     
     Returns:
         Formatted datetime string in GMT+3
     """
+    if not dt_str:
+        return "Unknown"
     try:
+        if isinstance(dt_str, (int, float)) or dt_str.isdigit():
+            # Fast path for epoch timestamps, no ISO parsing needed
+            dt = datetime.fromtimestamp(float(dt_str), tz=timezone.utc)
         # Parse ISO format datetime (handle both with and without 'Z')
-        if dt_str.endswith('Z'):
+        elif dt_str.endswith('Z'):
             dt = datetime.fromisoformat(dt_str.replace('Z', '+00:00'))
         else:
             dt = datetime.fromisoformat(dt_str)
         
-        # Convert to GMT+3
-        dt_gmt3 = dt.astimezone(GMT_PLUS_3)
-        
-        # Format based on type
-        if format_type == 'full':
-            return dt_gmt3.strftime('%Y-%m-%d %H:%M:%S GMT+3')
-        elif format_type == 'short':
-            return dt_gmt3.strftime('%m/%d %H:%M')
-        elif format_type == 'time':
-            return dt_gmt3.strftime('%H:%M:%S')
-        else:
-            return dt_gmt3.strftime('%Y-%m-%d %H:%M:%S GMT+3')
-    except:
-        return dt_str if dt_str else "Unknown"
+        # Convert to GMT+3 and format based on type
+        fmt = _DATETIME_FORMATS.get(format_type, _DATETIME_FORMATS['full'])
+        return dt.astimezone(GMT_PLUS_3).strftime(fmt)
+    except (ValueError, TypeError, AttributeError, OverflowError, OSError):
+        return str(dt_str)
+
+# Last formatted value per format type, keyed by whole epoch second
+_current_time_cache: Dict[str, tuple] = {}
 
 def get_current_time_gmt3(format_type: str = 'time') -> str:
-    """Get current time formatted in GMT+3."""
-    now = datetime.now(GMT_PLUS_3)
-    if format_type == 'time':
-        return now.strftime('%H:%M:%S')
-    elif format_type == 'full':
-        return now.strftime('%Y-%m-%d %H:%M:%S GMT+3')
-    else:
-        return now.strftime('%H:%M:%S')
+    """Get current time formatted in GMT+3 (reused within the same second)."""
+    if format_type != 'full':
+        format_type = 'time'
+    second = int(unix_time())
+    cached = _current_time_cache.get(format_type)
+    if cached is not None and cached[0] == second:
+        return cached[1]
+    formatted = datetime.fromtimestamp(second, GMT_PLUS_3).strftime(_DATETIME_FORMATS[format_type])
+    _current_time_cache[format_type] = (second, formatted)
+    return formatted
+
+# Today's GMT+3 bounds and label, rebuilt when the date changes
+_today_cache: Dict[str, Any] = {"day": None, "start": None, "end": None, "label": ""}
+
+def get_today_bounds_gmt3() -> tuple:
+    """Get (start, end, label) for the current GMT+3 day, reused until midnight."""
+    day = datetime.now(GMT_PLUS_3).date()
+    if day != _today_cache["day"]:
+        start = datetime.combine(day, time.min, tzinfo=GMT_PLUS_3)
+        _today_cache.update(
+            day=day,
+            start=start,
+            end=start + timedelta(days=1),
+            label=day.strftime('%Y-%m-%d')
+        )
+    return _today_cache["start"], _today_cache["end"], _today_cache["label"]
 
 class FitnessRewardsAPI:
     """API client for the fitness rewards server."""
@@ -90,38 +153,123 @@ class FitnessRewardsAPI:
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
         self.headers = {"X-API-Key": api_key}
+        # Shared pooled client, created on the running event loop by open()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._balance_cache: Dict[str, Any] = {"value": None, "fresh_until": 0.0, "stale_until": 0.0}
+        self._balance_refresh: Optional[asyncio.Task] = None
+        self._balance_generation = 0
+        # (ETag, body) of the last /balance response, for conditional requests
+        self._balance_etag: Optional[tuple] = None
+        self._summary_cache: Optional[tuple] = None
+    
+    def open(self) -> None:
+        """Create the shared HTTP client if it does not exist yet."""
+        if self._client is not None:
+            return
+        # Connections are pooled and kept alive between commands.
+        # The transport retries failed connection attempts only; a request that
+        # never reached the server is safe to repeat even for mutating calls.
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=2,
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=20,
+                    keepalive_expiry=30
+                )
+            ),
+            timeout=httpx.Timeout(connect=2.0, read=8.0, write=2.0, pool=1.0)
+        )
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared HTTP client, opened on first use."""
+        if self._client is None:
+            self.open()
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def _request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Send a request on the shared client and decode the JSON response."""
+        response = await self.client.request(method, path, params=params)
+        response.raise_for_status()
+        return orjson.loads(response.content)
     
     async def get_balance(self) -> Dict[str, Any]:
-        """Get current balance."""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/balance",
-                headers=self.headers
-            )
+        """Get current balance, served from a short-lived stale-while-revalidate cache."""
+        cache = self._balance_cache
+        if cache["value"] is not None:
+            now = monotonic()
+            if now < cache["fresh_until"]:
+                return cache["value"]
+            if now < cache["stale_until"]:
+                if self._balance_refresh is None or self._balance_refresh.done():
+                    self._balance_refresh = asyncio.create_task(self._background_refresh_balance())
+                return cache["value"]
+        return await self._refresh_balance()
+    
+    async def _refresh_balance(self) -> Dict[str, Any]:
+        """Fetch the balance from the server and store it in the cache."""
+        generation = self._balance_generation
+        known = self._balance_etag
+        response = await self.client.get(
+            "/balance",
+            headers={"If-None-Match": known[0]} if known else None
+        )
+        if response.status_code == 304 and known:
+            result = known[1]
+        else:
             response.raise_for_status()
-            return response.json()
+            result = orjson.loads(response.content)
+            etag = response.headers.get("ETag")
+            self._balance_etag = (etag, result) if etag else None
+        if generation != self._balance_generation:
+            # Invalidated while in flight; don't cache a possibly outdated value
+            return result
+        now = monotonic()
+        self._balance_cache = {
+            "value": result,
+            "fresh_until": now + BALANCE_CACHE_MAX_AGE,
+            "stale_until": now + BALANCE_CACHE_STALE_WINDOW
+        }
+        return result
+    
+    async def _background_refresh_balance(self) -> None:
+        """Refresh the cached balance without surfacing errors to callers."""
+        try:
+            await self._refresh_balance()
+        except Exception as e:
+            logger.warning(f"Background balance refresh failed: {e}")
+    
+    def invalidate_balance(self) -> None:
+        """Drop the cached balance and daily summary so the next read hits the server."""
+        self._balance_generation += 1
+        self._balance_cache = {"value": None, "fresh_until": 0.0, "stale_until": 0.0}
+        self._summary_cache = None
     
     async def withdraw_points(self, name: str, count: int) -> Dict[str, Any]:
         """Withdraw points."""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/withdraw",
-                params={"name": name, "count": count},
-                headers=self.headers
-            )
-            response.raise_for_status()
-            return response.json()
+        try:
+            return await self._request("GET", "/withdraw", {"name": name, "count": count})
+        finally:
+            # Never serve the cached pre-withdraw balance after this call
+            self.invalidate_balance()
     
     async def deposit_points(self, name: str, count: int) -> Dict[str, Any]:
         """Deposit points."""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/deposit",
-                params={"name": name, "count": count},
-                headers=self.headers
-            )
-            response.raise_for_status()
-            return response.json()
+        try:
+            return await self._request("GET", "/deposit", {"name": name, "count": count})
+        finally:
+            # Never serve the cached pre-deposit balance after this call
+            self.invalidate_balance()
     
     async def get_transactions(
         self, 
@@ -131,82 +279,218 @@ class FitnessRewardsAPI:
         end_date: Optional[datetime] = None
     ) -> list:
         """Get recent transactions with optional date filtering."""
-        async with httpx.AsyncClient() as client:
-            params = {"limit": limit}
-            if transaction_type:
-                params["type"] = transaction_type
-            if start_date:
-                params["start_date"] = start_date.isoformat()
-            if end_date:
-                params["end_date"] = end_date.isoformat()
-            
-            response = await client.get(
-                f"{self.base_url}/transactions",
-                params=params,
-                headers=self.headers
-            )
-            response.raise_for_status()
-            return response.json()
-        
+        params = {"limit": limit}
+        if transaction_type:
+            params["type"] = transaction_type
+        # Epoch seconds are unambiguous across time zones; the ISO form is kept
+        # for servers that don't understand start_ts/end_ts yet
+        if start_date:
+            params["start_date"] = start_date.isoformat()
+            params["start_ts"] = int(start_date.timestamp())
+        if end_date:
+            params["end_date"] = end_date.isoformat()
+            params["end_ts"] = int(end_date.timestamp())
+        
+        return await self._request("GET", "/transactions", params)
+    
+    async def get_daily_summary(self, start_date: datetime, end_date: datetime) -> list:
+        """Get per-activity deposit/withdraw totals for [start_date, end_date), briefly cached."""
+        key = (start_date, end_date)
+        cached = self._summary_cache
+        if cached is not None and cached[0] == key and monotonic() < cached[1]:
+            return cached[2]
+        generation = self._balance_generation
+        rows = await self._fetch_daily_summary(start_date, end_date)
+        # Shares the balance generation, so a deposit/withdraw in flight skips caching
+        if generation == self._balance_generation:
+            self._summary_cache = (key, monotonic() + DAILY_SUMMARY_CACHE_TTL, rows)
+        return rows
     
+    async def _fetch_daily_summary(self, start_date: datetime, end_date: datetime) -> list:
+        """Fetch the daily summary rows from the server."""
+        params = {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "start_ts": int(start_date.timestamp()),
+            "end_ts": int(end_date.timestamp())
+        }
+        try:
+            return await self._request("GET", "/transactions/summary", params)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 404:
+                raise
+            # Older servers lack the summary endpoint; aggregate locally instead
+            return await self._summarize_transactions(start_date, end_date)
+    
+    async def _summarize_transactions(self, start_date: datetime, end_date: datetime) -> list:
+        """Build summary rows client-side from the raw transaction list.
+        
+        /transactions has an inclusive end bound and a row limit, so rows stamped
+        exactly at `end_date` are dropped and the day is fetched page by page,
+        newest first, moving the end bound back to the oldest row seen.
+        """
+        totals: Dict[tuple, int] = {}
+        seen_ids: Set[int] = set()
+        page_end = end_date
+        for _ in range(SUMMARY_FALLBACK_MAX_PAGES):
+            page = await self.get_transactions(
+                limit=SUMMARY_FALLBACK_PAGE_SIZE,
+                start_date=start_date,
+                end_date=page_end
+            )
+            oldest = None
+            new_rows = 0
+            for transaction in page:
+                if transaction['id'] in seen_ids:
+                    continue
+                seen_ids.add(transaction['id'])
+                new_rows += 1
+                timestamp = datetime.fromisoformat(transaction['timestamp'])
+                if timestamp.tzinfo is None:
+                    # The server stores naive UTC timestamps
+                    timestamp = timestamp.replace(tzinfo=timezone.utc)
+                if oldest is None or timestamp < oldest:
+                    oldest = timestamp
+                if timestamp >= end_date:
+                    continue
+                key = (transaction['name'], transaction['type'])
+                totals[key] = totals.get(key, 0) + transaction['count']
+            if len(page) < SUMMARY_FALLBACK_PAGE_SIZE or not new_rows:
+                break
+            # The server may filter on whole epoch seconds; overlap by one second
+            # and rely on the id set to skip rows already counted
+            page_end = oldest + timedelta(seconds=1)
+        else:
+            logger.warning(
+                f"Daily summary fallback stopped after "
+                f"{SUMMARY_FALLBACK_MAX_PAGES * SUMMARY_FALLBACK_PAGE_SIZE} transactions; totals may be incomplete"
+            )
+        return [
+            {"name": name, "type": trans_type, "count": count}
+            for (name, trans_type), count in totals.items()
+        ]
     
     async def get_registered_chats(self) -> list:
         """Get list of registered chats."""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/registered_chats",
-                headers=self.headers
-            )
-            response.raise_for_status()
-            return response.json()
+        return await self._request("GET", "/registered_chats")
     
     async def register_chat(self, chat_id: int, username: str = None, 
                           first_name: str = None, last_name: str = None) -> Dict[str, Any]:
         """Register a chat for notifications."""
-        async with httpx.AsyncClient() as client:
-            params = {"chat_id": chat_id}
-            if username:
-                params["username"] = username
-            if first_name:
-                params["first_name"] = first_name
-            if last_name:
-                params["last_name"] = last_name
-            
-            response = await client.post(
-                f"{self.base_url}/register_chat",
-                params=params,
-                headers=self.headers
-            )
-            response.raise_for_status()
-            return response.json()
+        params = {"chat_id": chat_id}
+        if username:
+            params["username"] = username
+        if first_name:
+            params["first_name"] = first_name
+        if last_name:
+            params["last_name"] = last_name
+        
+        return await self._request("POST", "/register_chat", params)
     
     async def unregister_chat(self, chat_id: int) -> Dict[str, Any]:
         """Unregister a chat from notifications."""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/unregister_chat",
-                params={"chat_id": chat_id},
-                headers=self.headers
-            )
-            response.raise_for_status()
-            return response.json()
+        return await self._request("POST", "/unregister_chat", {"chat_id": chat_id})
 
 # Initialize API client
 api = FitnessRewardsAPI(SERVER_URL, API_KEY)
 
+# Chat IDs known to be registered for notifications, seeded in post_init
+REGISTERED_CHATS: Set[int] = set()
+
+# Characters that have special meaning in Markdown, mapped to their escaped form
+_MD_SPECIAL = frozenset('*_[]()`~')
+_MD_ESCAPE = str.maketrans({char: f'\\{char}' for char in _MD_SPECIAL})
+# Telegram MarkdownV2 requires all of these to be escaped in literal text
+_MDV2_SPECIAL = frozenset('\\_*[]()~`>#+-=|{}.!')
+_MDV2_ESCAPE = str.maketrans({char: f'\\{char}' for char in _MDV2_SPECIAL})
+
 def escape_markdown(text: str) -> str:
     """Escape special characters for Telegram Markdown formatting."""
-    if not text:
+    # Most names are plain; return them as-is without building a new string
+    if not text or _MD_SPECIAL.isdisjoint(text):
         return text
-    # Escape characters that have special meaning in Markdown
-    special_chars = ['*', '_', '[', ']', '(', ')', '`', '~']
-    for char in special_chars:
-        text = text.replace(char, f'\\{char}')
-    return text
+    return text.translate(_MD_ESCAPE)
 
-async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Send a message when the command /start is issued."""
-    welcome_text = """
+def escape_markdown_v2(text: str) -> str:
+    """Escape special characters for Telegram MarkdownV2 formatting."""
+    if not text or _MDV2_SPECIAL.isdisjoint(text):
+        return text
+    return text.translate(_MDV2_ESCAPE)
+
+def _hard_cut(text: str, start: int, end: int) -> int:
+    """Move a mid-line cut point back so it splits no MarkdownV2 escape or entity.
+    
+    Walks the chunk (which holds no line break), skipping escape pairs, and ends
+    it before an escape pair that straddles `end` or before a `*`/`_` entity
+    still open there.
+    """
+    pos = start
+    open_at = -1
+    while pos < end:
+        char = text[pos]
+        if char == '\\':
+            if pos + 1 == end:
+                # The escaped character would start the next chunk
+                break
+            pos += 2
+            continue
+        if char in '*_':
+            open_at = -1 if open_at >= 0 else pos
+        pos += 1
+    if open_at > start:
+        return open_at
+    return pos if pos > start else end
+
+def iter_message_chunks(text: str, limit: int = MAX_MESSAGE_LENGTH) -> Iterator[str]:
+    """Lazily split MarkdownV2 text into chunks of at most `limit` characters.
+    
+    Chunks end on a blank line where possible so a transaction entry is
+    never split across two messages, otherwise on a line break. A single line
+    longer than `limit` is cut mid-line, but never inside an escape pair or
+    an open bold/italic entity, so every chunk stays valid MarkdownV2.
+    """
+    start = 0
+    length = len(text)
+    while start < length:
+        end = start + limit
+        if end < length:
+            boundary = text.rfind('\n\n', start, end)
+            if boundary > start:
+                end = boundary + 2
+            else:
+                boundary = text.rfind('\n', start, end)
+                end = boundary + 1 if boundary > start else _hard_cut(text, start, end)
+        yield text[start:end]
+        start = end
+
+class ActivityTotals:
+    """Deposit and withdraw totals for one activity name."""
+    __slots__ = ('deposit', 'withdraw')
+    
+    def __init__(self) -> None:
+        self.deposit = 0
+        self.withdraw = 0
+
+def handler_errors(log_message: str, error_reply: str) -> Callable:
+    """Wrap a command handler with shared error replies and slow-call logging."""
+    def decorator(func: Callable[[Update, ContextTypes.DEFAULT_TYPE], Awaitable[None]]) -> Callable:
+        @wraps(func)
+        async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+            started = perf_counter()
+            try:
+                await func(update, context)
+            except Exception as e:
+                logger.error(f"{log_message}: {e}")
+                await update.message.reply_text(error_reply)
+            finally:
+                elapsed = perf_counter() - started
+                if elapsed > SLOW_HANDLER_THRESHOLD:
+                    logger.warning(f"Yavaş komut {func.__name__}: {elapsed:.2f}s")
+        return wrapper
+    return decorator
+
+# Static reply texts, built once at import time
+WELCOME_TEXT = """
 **Fitness Rewards Bot'a Hoşgeldiniz!**
 
 Bu bot fitness ödül puanlarınızı yönetmenize yardımcı olur. Kullanılabilir komutlar:
@@ -229,153 +513,225 @@ Bu bot fitness ödül puanlarınızı yönetmenize yardımcı olur. Kullanılabi
 
 Başlamak için mevcut puanlarınızı görmek için /balance yazın!
     """
-    await update.message.reply_text(welcome_text, parse_mode='Markdown')
+
+WITHDRAW_MISSING_AMOUNT_TEXT = (
+    "❌ Lütfen çekilecek miktarı belirtin.\n"
+    "Kullanım: `/withdraw {miktar}` veya `/withdraw {miktar} {aktivite}`\n"
+    "Örnek: `/withdraw 50` veya `/withdraw 50 TV İzleme`"
+)
+
+WITHDRAW_INVALID_AMOUNT_TEXT = (
+    "❌ Lütfen geçerli bir sayı girin.\n"
+    "Kullanım: `/withdraw {miktar}` veya `/withdraw {miktar} {aktivite}`\n"
+    "Örnek: `/withdraw 50` veya `/withdraw 50 Oyun`"
+)
+
+DEPOSIT_MISSING_AMOUNT_TEXT = (
+    "❌ Lütfen eklenecek miktarı belirtin.\n"
+    "Kullanım: `/deposit {miktar}` veya `/deposit {miktar} {kaynak_adı}`\n"
+    "Örnek: `/deposit 100` veya `/deposit 100 Egzersiz Tamamlandı`"
+)
+
+DEPOSIT_INVALID_AMOUNT_TEXT = (
+    "❌ Lütfen geçerli bir sayı girin.\n"
+    "Kullanım: `/deposit {miktar}` veya `/deposit {miktar} {kaynak_adı}`\n"
+    "Örnek: `/deposit 100` veya `/deposit 100 Kardiyo Seansı`"
+)
+
+WITHDRAW_SUCCESS_TEMPLATE = (
+    "✅ **Çekme işlemi başarılı!**\n\n"
+    "➖ **{amount}** puan çekildi\n"
+    "🏷️ Aktivite: {activity_name}\n"
+    "💰 Yeni Bakiye: **{new_balance}** puan\n"
+    "⏰ {time} GMT+3"
+)
+
+DEPOSIT_SUCCESS_TEMPLATE = (
+    "✅ **Yatırma işlemi başarılı!**\n\n"
+    "➕ **{amount}** puan eklendi\n"
+    "🏷️ Kaynak: {source_name}\n"
+    "💰 Yeni Bakiye: **{new_balance}** puan\n"
+    "⏰ {time} GMT+3"
+)
+
+async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Send a message when the command /start is issued."""
+    await update.message.reply_text(WELCOME_TEXT, parse_mode='Markdown')
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send help message."""
-    await start(update, context)
+    await update.message.reply_text(WELCOME_TEXT, parse_mode='Markdown')
 
+@handler_errors("Error registering chat", "❌ Bildirimlere kaydolunamadı. Lütfen daha sonra tekrar deneyin.")
 async def register(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Register the chat for notifications."""
-    try:
-        chat_id = update.effective_chat.id
-        user = update.effective_user
-        
-        result = await api.register_chat(
-            chat_id=chat_id,
-            username=user.username,
-            first_name=user.first_name,
-            last_name=user.last_name
-        )
-        
+    chat_id = update.effective_chat.id
+    user = update.effective_user
+    if chat_id in REGISTERED_CHATS:
         await update.message.reply_text(
-            f"✅ {result['message']}\n\n"
-            "Artık bakiyeniz değiştiğinde bildirim alacaksınız!"
+            "✅ Zaten kayıtlısınız.\n\n"
             "Bildirimleri devre dışı bırakmak için istediğiniz zaman /unregister kullanabilirsiniz."
         )
-        
-    except Exception as e:
-        logger.error(f"Error registering chat: {e}")
-        await update.message.reply_text(
-            "❌ Bildirimlere kaydolunamadı. Lütfen daha sonra tekrar deneyin."
-        )
+        # Still tell the server after replying: the chat may have been deactivated
+        # elsewhere, and the user's names may have changed
+        try:
+            await api.register_chat(
+                chat_id=chat_id,
+                username=user.username,
+                first_name=user.first_name,
+                last_name=user.last_name
+            )
+        except Exception as e:
+            logger.error(f"Error refreshing chat registration: {e}")
+            # Forget the chat so the next /register does a full round trip
+            REGISTERED_CHATS.discard(chat_id)
+        return
+    
+    result = await api.register_chat(
+        chat_id=chat_id,
+        username=user.username,
+        first_name=user.first_name,
+        last_name=user.last_name
+    )
+    REGISTERED_CHATS.add(chat_id)
+    
+    await update.message.reply_text(
+        f"✅ {result['message']}\n\n"
+        "Artık bakiyeniz değiştiğinde bildirim alacaksınız!"
+        "Bildirimleri devre dışı bırakmak için istediğiniz zaman /unregister kullanabilirsiniz."
+    )
 
+@handler_errors("Error unregistering chat", "❌ Bildirim kaydı kaldırılamadı. Lütfen daha sonra tekrar deneyin.")
 async def unregister(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Unregister the chat from notifications."""
-    try:
-        chat_id = update.effective_chat.id
-        
-        result = await api.unregister_chat(chat_id=chat_id)
-        
-        await update.message.reply_text(
-                "Artık bakiyeniz değiştiğinde bildirim almayacaksınız.\n"
-                "Bildirimleri yeniden etkinleştirmek için istediğiniz zaman /register kullanabilirsiniz."
-        )
-        
-        
-    except Exception as e:
-        logger.error(f"Error unregistering chat: {e}")
-        await update.message.reply_text(
-            "❌ Bildirim kaydı kaldırılamadı. Lütfen daha sonra tekrar deneyin."
-        )
+    chat_id = update.effective_chat.id
+    
+    result = await api.unregister_chat(chat_id=chat_id)
+    REGISTERED_CHATS.discard(chat_id)
+    
+    await update.message.reply_text(
+        "Artık bakiyeniz değiştiğinde bildirim almayacaksınız.\n"
+        "Bildirimleri yeniden etkinleştirmek için istediğiniz zaman /register kullanabilirsiniz."
+    )
 
+@handler_errors("Error getting balance", "❌ Bakiye alınamadı. Lütfen daha sonra tekrar deneyin.")
 async def balance(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Get current balance."""
-    try:
-        result = await api.get_balance()
-        balance_amount = result.get('balance', 0)
-        last_updated = result.get('last_updated', 'Unknown')
-        
-        # Parse and format the timestamp
-        formatted_time = format_datetime_for_user(last_updated, 'full')
+    result = await api.get_balance()
+    balance_amount = result.get('balance', 0)
+    last_updated = result.get('last_updated', 'Unknown')
+    
+    # Parse and format the timestamp
+    formatted_time = format_datetime_for_user(last_updated, 'full')
 
-        message = f"💰 **Bakiye:** {balance_amount} puan\n📅 **Son Güncelleme:** {formatted_time}"
-        await update.message.reply_text(message, parse_mode='Markdown')
-        
-    except Exception as e:
-        logger.error(f"Error getting balance: {e}")
-        await update.message.reply_text(
-            "❌ Bakiye alınamadı. Lütfen daha sonra tekrar deneyin."
-        )
+    message = f"💰 **Bakiye:** {balance_amount} puan\n📅 **Son Güncelleme:** {formatted_time}"
+    await update.message.reply_text(message, parse_mode='Markdown')
 
 async def status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Get detailed status including balance and today's transaction summary."""
+    balance_amount = None
     try:
-        # Get balance
-        balance_result = await api.get_balance()
+        # Get today's date range in GMT+3
+        today_start, today_end, today_formatted = get_today_bounds_gmt3()
+        
+        # Get balance and today's per-activity totals concurrently; the summary
+        # is only cancelled when the balance fails, since then nothing can be shown
+        summary_task = asyncio.ensure_future(api.get_daily_summary(today_start, today_end))
+        try:
+            balance_result = await api.get_balance()
+        except BaseException:
+            summary_task.cancel()
+            await asyncio.gather(summary_task, return_exceptions=True)
+            raise
         balance_amount = balance_result.get('balance', 0)
         last_updated = balance_result.get('last_updated', 'Unknown')
+        summary_failed = False
+        try:
+            today_summary = await summary_task
+        except Exception as e:
+            # Only the daily section is unavailable; still show the balance
+            logger.error(f"Error getting daily summary: {e}")
+            today_summary = None
+            summary_failed = True
         
         # Format timestamp
         formatted_time = format_datetime_for_user(last_updated, 'full')
         
-        # Get today's date range in GMT+3
-        now_gmt3 = datetime.now(GMT_PLUS_3)
-        today_start = now_gmt3.replace(hour=0, minute=0, second=0, microsecond=0)
-        today_end = now_gmt3.replace(hour=23, minute=59, second=59, microsecond=999999)
-        
-        # Get today's transactions
-        today_transactions = await api.get_transactions(
-            limit=100,  # Get enough to cover a full day
-            start_date=today_start,
-            end_date=today_end
-        )
-        
         # Build status message (escape special characters for Markdown)
-        status_message = "📊 *Fitnes Ödül Durumu* 📊\n\n"
-        status_message += f"💰 *Bakiye:* {balance_amount} puan\n"
-        status_message += f"📅 *Son Güncelleme:* {formatted_time}\n"
+        parts = [
+            "📊 *Fitnes Ödül Durumu* 📊\n\n",
+            f"💰 *Bakiye:* {balance_amount} puan\n",
+            f"📅 *Son Güncelleme:* {formatted_time}\n",
+        ]
 
         # Add today's summary
-        today_formatted = now_gmt3.strftime('%Y-%m-%d')
-        status_message += f"\n *Bugün Özeti ({today_formatted}):*\n"
-        
-        if today_transactions:
-            # Group transactions by name and type, sum counts
-            summary = defaultdict(lambda: {'deposit': 0, 'withdraw': 0})
+        parts.append(f"\n *Bugün Özeti ({today_formatted}):*\n")
+        
+        if today_summary:
+            # Pivot the server's (name, type) totals into one entry per name
+            # and accumulate the daily totals in the same pass
+            summary: Dict[str, ActivityTotals] = {}
+            summary_get = summary.get
+            total_deposits = 0
+            total_withdrawals = 0
             
-            for transaction in today_transactions:
-                name = transaction['name']
-                trans_type = transaction['type']
-                count = transaction['count']
-                summary[name][trans_type] += count
+            for row in today_summary:
+                name = row['name']
+                count = row['count']
+                bucket = summary_get(name)
+                if bucket is None:
+                    bucket = summary[name] = ActivityTotals()
+                if row['type'] == 'deposit':
+                    bucket.deposit += count
+                    total_deposits += count
+                else:
+                    bucket.withdraw += count
+                    total_withdrawals += count
             
-            # Calculate totals
-            total_deposits = sum(item['deposit'] for item in summary.values())
-            total_withdrawals = sum(item['withdraw'] for item in summary.values())
             net_change = total_deposits - total_withdrawals
             
             # Display summary by activity
             for name, amounts in summary.items():
-                deposits = amounts['deposit']
-                withdrawals = amounts['withdraw']
+                deposits = amounts.deposit
+                withdrawals = amounts.withdraw
                 escaped_name = escape_markdown(name)
                 
                 if deposits > 0 and withdrawals > 0:
                     net = deposits - withdrawals
                     net_emoji = "➕" if net > 0 else "➖"
-                    status_message += f"🔄 *{escaped_name}:* ➕{deposits} ➖{withdrawals} ({net_emoji}{abs(net)})\n"
+                    parts.append(f"🔄 *{escaped_name}:* ➕{deposits} ➖{withdrawals} ({net_emoji}{abs(net)})\n")
                 elif deposits > 0:
-                    status_message += f"➕ *{escaped_name}:* +{deposits} puan\n"
+                    parts.append(f"➕ *{escaped_name}:* +{deposits} puan\n")
                 elif withdrawals > 0:
-                    status_message += f"➖ *{escaped_name}:* -{withdrawals} puan\n"
+                    parts.append(f"➖ *{escaped_name}:* -{withdrawals} puan\n")
             
             # Add totals
-            status_message += f"\n📊 *Günlük Toplamlar:*\n"
-            status_message += f"➕ *Toplam Kazanılan:* {total_deposits} puan\n"
-            status_message += f"➖ *Toplam Harcanan:* {total_withdrawals} puan\n"
+            parts.append("\n📊 *Günlük Toplamlar:*\n")
+            parts.append(f"➕ *Toplam Kazanılan:* {total_deposits} puan\n")
+            parts.append(f"➖ *Toplam Harcanan:* {total_withdrawals} puan\n")
 
             net_emoji = "🟢" if net_change > 0 else "🔴" if net_change < 0 else "⚪"
             sign = "+" if net_change > 0 else ""
-            status_message += f"{net_emoji} *Net Değişim:* {sign}{net_change} puan\n"
+            parts.append(f"{net_emoji} *Net Değişim:* {sign}{net_change} puan\n")
 
+        elif summary_failed:
+            parts.append("⚠️ Bugün özeti şu anda alınamadı.\n")
         else:
-            status_message += "Bugün için henüz işlem yok.\n"
+            parts.append("Bugün için henüz işlem yok.\n")
 
+        status_message = "".join(parts)
         await update.message.reply_text(status_message, parse_mode='Markdown')
         
     except Exception as e:
         logger.error(f"Error getting status: {e}")
+        if balance_amount is None:
+            # The balance itself could not be fetched; there is nothing to fall back to.
+            # balance_amount is set as soon as the balance arrives, so summary and
+            # Markdown failures always end up in the balance-only fallback below.
+            await update.message.reply_text(
+                "❌ Failed to get status. Please try again later."
+            )
+            return
         # Fallback to plain text if Markdown fails
         try:
             await update.message.reply_text(
@@ -383,7 +739,7 @@ async def status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
                 f"💰 Current Balance: {balance_amount} points\n"
                 f"❌ Error displaying detailed status. Use /balance and /transactions separately."
             )
-        except:
+        except Exception:
             await update.message.reply_text(
                 "❌ Failed to get status. Please try again later."
             )
@@ -392,21 +748,13 @@ async def withdraw(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Withdraw points with optional activity name."""
     try:
         if not context.args:
-            await update.message.reply_text(
-                "❌ Lütfen çekilecek miktarı belirtin.\n"
-                "Kullanım: `/withdraw {miktar}` veya `/withdraw {miktar} {aktivite}`\n"
-                "Örnek: `/withdraw 50` veya `/withdraw 50 TV İzleme`"
-            )
+            await update.message.reply_text(WITHDRAW_MISSING_AMOUNT_TEXT)
             return
         
         try:
             amount = int(context.args[0])
         except ValueError:
-            await update.message.reply_text(
-                "❌ Lütfen geçerli bir sayı girin.\n"
-                "Kullanım: `/withdraw {miktar}` veya `/withdraw {miktar} {aktivite}`\n"
-                "Örnek: `/withdraw 50` veya `/withdraw 50 Oyun`"
-            )
+            await update.message.reply_text(WITHDRAW_INVALID_AMOUNT_TEXT)
             return
         
         if amount <= 0:
@@ -423,19 +771,19 @@ async def withdraw(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         result = await api.withdraw_points(activity_name, amount)
         
         new_balance = result.get('balance', 'Unknown')
-        message = (
-            f"✅ **Çekme işlemi başarılı!**\n\n"
-            f"➖ **{amount}** puan çekildi\n"
-            f"🏷️ Aktivite: {escape_markdown(activity_name)}\n"
-            f"💰 Yeni Bakiye: **{new_balance}** puan\n"
-            f"⏰ {get_current_time_gmt3('time')} GMT+3"
+        message = WITHDRAW_SUCCESS_TEMPLATE.format(
+            amount=amount,
+            activity_name=escape_markdown(activity_name),
+            new_balance=new_balance,
+            time=get_current_time_gmt3('time')
         )
         
         await update.message.reply_text(message, parse_mode='Markdown')
         
-    except Exception as e:
+    except httpx.HTTPStatusError as e:
         logger.error(f"Error in withdraw command: {e}")
-        if "insufficient" in str(e).lower() or "balance" in str(e).lower():
+        # The server answers 400 when the balance cannot cover the withdrawal
+        if e.response.status_code == 400:
             await update.message.reply_text(
                 f"❌ {amount} puan çekmek için yeterli bakiyeniz yok.\n"
                 "Mevcut bakiyenizi /balance ile kontrol edebilirsiniz."
@@ -444,26 +792,23 @@ async def withdraw(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             await update.message.reply_text(
                 f"❌ Puan çekme işlemi başarısız oldu: {str(e)}"
             )
+    except Exception as e:
+        logger.error(f"Error in withdraw command: {e}")
+        await update.message.reply_text(
+            f"❌ Puan çekme işlemi başarısız oldu: {str(e)}"
+        )
             
 async def deposit(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Puan ekleme işlemi (isteğe bağlı kaynak adı ile)."""
     try:
         if not context.args:
-            await update.message.reply_text(
-                "❌ Lütfen eklenecek miktarı belirtin.\n"
-                "Kullanım: `/deposit {miktar}` veya `/deposit {miktar} {kaynak_adı}`\n"
-                "Örnek: `/deposit 100` veya `/deposit 100 Egzersiz Tamamlandı`"
-            )
+            await update.message.reply_text(DEPOSIT_MISSING_AMOUNT_TEXT)
             return
         
         try:
             amount = int(context.args[0])
         except ValueError:
-            await update.message.reply_text(
-                "❌ Lütfen geçerli bir sayı girin.\n"
-                "Kullanım: `/deposit {miktar}` veya `/deposit {miktar} {kaynak_adı}`\n"
-                "Örnek: `/deposit 100` veya `/deposit 100 Kardiyo Seansı`"
-            )
+            await update.message.reply_text(DEPOSIT_INVALID_AMOUNT_TEXT)
             return
         
         if amount <= 0:
@@ -480,12 +825,11 @@ async def deposit(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         result = await api.deposit_points(source_name, amount)
         
         new_balance = result.get('balance', 'Unknown')
-        message = (
-            f"✅ **Yatırma işlemi başarılı!**\n\n"
-            f"➕ **{amount}** puan eklendi\n"
-            f"🏷️ Kaynak: {escape_markdown(source_name)}\n"
-            f"💰 Yeni Bakiye: **{new_balance}** puan\n"
-            f"⏰ {get_current_time_gmt3('time')} GMT+3"
+        message = DEPOSIT_SUCCESS_TEMPLATE.format(
+            amount=amount,
+            source_name=escape_markdown(source_name),
+            new_balance=new_balance,
+            time=get_current_time_gmt3('time')
         )
         
         await update.message.reply_text(message, parse_mode='Markdown')
@@ -496,59 +840,44 @@ async def deposit(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             f"❌ Puan ekleme işlemi başarısız oldu: {str(e)}"
         )
 
+@handler_errors("İşlemler alınırken hata", "❌ İşlemler alınamadı. Lütfen daha sonra tekrar deneyin.")
 async def transactions(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Son işlemleri getirir."""
-    try:
-        limit = 10
-        if context.args and context.args[0].isdigit():
-            limit = min(int(context.args[0]), 20)  # Maksimum 20 işlem
-        
-        result = await api.get_transactions(limit=limit)
-        
-        if not result:
-            await update.message.reply_text("📝 Hiç işlem bulunamadı.")
-            return
-        
-        message = f"📋 **Son İşlemler (Son {len(result)}):**\n\n"
-        
-        for transaction in result:
-            # Zaman damgasını biçimlendir
-            formatted_time = format_datetime_for_user(transaction['timestamp'], 'short')
-            
-            type_emoji = "➕" if transaction['type'] == 'deposit' else "➖"
-            count = transaction['count']
-            # Ad içindeki özel Markdown karakterlerini kaçır
-            name = escape_markdown(transaction['name'])
-            balance_after = transaction['balance_after']
-            
-            message += f"{type_emoji} **{count}** puan - {name}\n"
-            message += f"   ⏰ {formatted_time} | Bakiye: {balance_after}\n\n"
-        
-        # Mesaj çok uzunsa böl
-        if len(message) > 4000:
-            messages = [message[i:i+4000] for i in range(0, len(message), 4000)]
-            for i, msg in enumerate(messages):
-                try:
-                    await update.message.reply_text(msg, parse_mode='Markdown')
-                except Exception as e:
-                    logger.warning(f"İşlem mesajı {i+1} Markdown ile gönderilemedi: {e}")
-                    # Markdown olmadan gönder
-                    fallback_msg = msg.replace('*', '').replace('_', '')
-                    await update.message.reply_text(fallback_msg)
-        else:
-            try:
-                await update.message.reply_text(message, parse_mode='Markdown')
-            except Exception as e:
-                logger.warning(f"İşlemler Markdown ile gönderilemedi: {e}")
-                # Markdown olmadan gönder
-                fallback_message = message.replace('*', '').replace('_', '')
-                await update.message.reply_text(fallback_message)
-        
-    except Exception as e:
-        logger.error(f"İşlemler alınırken hata: {e}")
-        await update.message.reply_text(
-            "❌ İşlemler alınamadı. Lütfen daha sonra tekrar deneyin."
-        )
+    limit = 10
+    if context.args and context.args[0].isdigit():
+        limit = min(int(context.args[0]), 20)  # Maksimum 20 işlem
+    
+    result = await api.get_transactions(limit=limit)
+    
+    if not result:
+        await update.message.reply_text("📝 Hiç işlem bulunamadı.")
+        return
+    
+    # MarkdownV2: every dynamic field is fully escaped up front, so Telegram
+    # never rejects the message and no plain-text fallback send is needed
+    parts = [f"📋 *Son İşlemler \\(Son {len(result)}\\):*\n\n"]
+    
+    for transaction in result:
+        # Zaman damgasını biçimlendir
+        # Prefer the epoch form when the server provides it (no ISO parsing)
+        formatted_time = escape_markdown_v2(format_datetime_for_user(
+            transaction.get('timestamp_epoch') or transaction['timestamp'], 'short'
+        ))
+        
+        type_emoji = "➕" if transaction['type'] == 'deposit' else "➖"
+        count = escape_markdown_v2(str(transaction['count']))
+        # Ad içindeki özel Markdown karakterlerini kaçır
+        name = escape_markdown_v2(transaction['name'])
+        balance_after = escape_markdown_v2(str(transaction['balance_after']))
+        
+        parts.append(f"{type_emoji} *{count}* puan \\- {name}\n")
+        parts.append(f"   ⏰ {formatted_time} \\| Bakiye: {balance_after}\n\n")
+    
+    message = "".join(parts)
+    
+    # Mesaj çok uzunsa böl (parçalar işlem sınırlarında bölünür)
+    for msg in iter_message_chunks(message):
+        await update.message.reply_text(msg, parse_mode='MarkdownV2')
 
 async def unknown_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Bilinmeyen komutları karşılar."""
@@ -556,23 +885,69 @@ async def unknown_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         "❓ Bilinmeyen komut. Mevcut komutları görmek için /help yazın."
     )
 
+# Otomatik tamamlama için bot komutları
+BOT_COMMANDS = (
+    BotCommand("start", "Karşılama mesajı ve talimatlar"),
+    BotCommand("balance", "Mevcut puan bakiyenizi kontrol edin"),
+    BotCommand("status", "Detaylı bakiye ve aktivite durumu"),
+    BotCommand("withdraw", "Puan çek (kullanım: /withdraw {miktar})"),
+    BotCommand("deposit", "Manuel puan ekle (kullanım: /deposit {miktar})"),
+    BotCommand("transactions", "Son işlem geçmişini görüntüle"),
+    BotCommand("register", "Bakiye değişikliği bildirimlerine kaydol"),
+    BotCommand("unregister", "Bakiye değişikliği bildirimlerinden çık"),
+    BotCommand("help", "Yardım mesajını göster"),
+)
+
+def compute_commands_hash(commands: Sequence[BotCommand]) -> str:
+    """Hash the bot identity and command list to detect changes between runs."""
+    bot_id = TELEGRAM_BOT_TOKEN.split(':', 1)[0]
+    payload = repr((bot_id, [(c.command, c.description) for c in commands]))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+def read_commands_hash() -> Optional[str]:
+    """Read the hash of the last command list sent to Telegram, if any."""
+    try:
+        with open(COMMANDS_HASH_FILE, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def write_commands_hash(commands_hash: str) -> None:
+    """Persist the hash of the command list that was just sent to Telegram."""
+    try:
+        os.makedirs(os.path.dirname(COMMANDS_HASH_FILE), exist_ok=True)
+        with open(COMMANDS_HASH_FILE, 'w') as f:
+            f.write(commands_hash)
+    except OSError as e:
+        logger.warning(f"Komut hash dosyası yazılamadı: {e}")
+
 async def post_init(application: Application) -> None:
     """Uygulama başlatıldıktan sonra çağrılır."""
-    # Otomatik tamamlama için bot komutlarını ayarla
-    commands = [
-        BotCommand("start", "Karşılama mesajı ve talimatlar"),
-        BotCommand("balance", "Mevcut puan bakiyenizi kontrol edin"),
-        BotCommand("status", "Detaylı bakiye ve aktivite durumu"),
-        BotCommand("withdraw", "Puan çek (kullanım: /withdraw {miktar})"),
-        BotCommand("deposit", "Manuel puan ekle (kullanım: /deposit {miktar})"),
-        BotCommand("transactions", "Son işlem geçmişini görüntüle"),
-        BotCommand("register", "Bakiye değişikliği bildirimlerine kaydol"),
-        BotCommand("unregister", "Bakiye değişikliği bildirimlerinden çık"),
-        BotCommand("help", "Yardım mesajını göster"),
-    ]
+    # API istemcisini çalışan olay döngüsü üzerinde oluştur
+    api.open()
+    
+    # Bağlantıyı önceden aç; ilk kullanıcı komutu el sıkışma maliyetini ödemesin
+    try:
+        await api.client.get("/health", timeout=2.0)
+    except Exception as e:
+        logger.debug(f"Sunucu ısınma isteği başarısız: {e}")
+    
+    # Kayıtlı sohbetleri önceden yükle (tekrarlanan /register çağrılarını yerel yanıtlamak için)
+    try:
+        REGISTERED_CHATS.update(chat['chat_id'] for chat in await api.get_registered_chats())
+    except Exception as e:
+        logger.warning(f"Kayıtlı sohbetler yüklenemedi: {e}")
+    
+    # Otomatik tamamlama için bot komutlarını ayarla;
+    # komutlar değişmediyse Telegram API çağrısını atla
+    commands_hash = compute_commands_hash(BOT_COMMANDS)
+    if read_commands_hash() == commands_hash:
+        logger.info("Bot komutları değişmedi, ayarlama atlanıyor")
+        return
     
     try:
-        await application.bot.set_my_commands(commands)
+        await application.bot.set_my_commands(BOT_COMMANDS)
+        write_commands_hash(commands_hash)
         logger.info("Bot komutları otomatik tamamlama için başarıyla ayarlandı")
     except Exception as e:
         logger.error(f"Bot komutları ayarlanamadı: {e}")
@@ -582,12 +957,23 @@ async def post_init(application: Application) -> None:
 
 async def post_shutdown(application: Application) -> None:
     """Called before the application shuts down."""
-   
+    await api.aclose()
+
 
 def main() -> None:
     """Start the bot."""
-    # Create the Application
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    # Create the Application; HTTP/2 lets concurrent Bot API calls share one connection.
+    # Updates are handled concurrently so one slow command doesn't block other users.
+    # Outgoing calls are throttled to Telegram's 30 msg/s limit instead of hitting 429s.
+    application = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(True)
+        .request(HTTPXRequest(connection_pool_size=32, http_version="2", pool_timeout=5.0))
+        .get_updates_request(HTTPXRequest(connection_pool_size=1, http_version="2"))
+        .rate_limiter(AIORateLimiter(overall_max_rate=30, overall_time_period=1, max_retries=2))
+        .build()
+    )
     
     # Add command handlers
     application.add_handler(CommandHandler("start", start))
@@ -610,8 +996,27 @@ def main() -> None:
     logger.info("Starting Fitness Rewards Telegram Bot...")
     logger.info(f"Server URL: {SERVER_URL}")
 
+    # Use the libuv-based event loop when it is installed (pulled in by uvicorn[standard])
+    if sys.platform != 'win32':
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            logger.info("uvloop not available, using the default asyncio event loop")
+
     # Run the bot until the user presses Ctrl-C
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    if WEBHOOK_URL:
+        logger.info(f"Webhook mode on port {WEBHOOK_PORT}")
+        application.run_webhook(
+            listen="0.0.0.0",
+            port=WEBHOOK_PORT,
+            url_path=TELEGRAM_BOT_TOKEN,
+            webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{TELEGRAM_BOT_TOKEN}",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=Update.ALL_TYPES
+        )
+    else:
+        application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 if __name__ == '__main__':
     main()
@@ -16,16 +16,18 @@ Commands:
 """
 
 import asyncio
-import json
 import logging
 import os
 import sys
 import signal
+import threading
+import time
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
 from pathlib import Path
 
 import aiohttp
+import orjson
 from pyatv import scan, connect, const, exceptions
 from pyatv import pair as atv_pair
 
@@ -35,6 +37,8 @@ SERVER_URL = os.getenv("SERVER_URL", "http://server:8000")
 API_KEY = os.getenv("API_KEY", "your-secret-api-key-123")
 CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL", "60"))  # Check every 60 seconds
 POINTS_PER_CHECK = int(os.getenv("POINTS_PER_CHECK", "1"))  # Charge 1 point per check
+SCAN_CACHE_TTL = 30  # Reuse network scan results for this many seconds
+IDLE_BALANCE_REFRESH_CYCLES = 10  # While nothing plays, still re-read the balance every N cycles
 
 # Logging setup
 logging.basicConfig(
@@ -81,14 +85,18 @@ class DeviceManager:
     def __init__(self, config_file: str):
         self.config_file = config_file
         self.devices: Dict[str, DeviceConfig] = {}
+        # Last payload written to disk, so unchanged saves can be skipped
+        self._last_serialized: Optional[bytes] = None
+        # Serializes writers so concurrent saves can't interleave on the temp file
+        self._save_lock = threading.Lock()
         self.load_config()
     
     def load_config(self):
         """Load device configuration from file."""
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    data = json.load(f)
+                with open(self.config_file, 'rb') as f:
+                    data = orjson.loads(f.read())
                     for device_data in data.get("devices", []):
                         config = DeviceConfig.from_dict(device_data)
                         self.devices[config.identifier] = config
@@ -99,16 +107,34 @@ class DeviceManager:
             logger.error(f"Failed to load config: {e}")
     
     def save_config(self):
-        """Save device configuration to file."""
-        try:
-            data = {
-                "devices": [device.to_dict() for device in self.devices.values()]
-            }
-            with open(self.config_file, 'w') as f:
-                json.dump(data, f, indent=2)
-            logger.info(f"Saved {len(self.devices)} devices to config")
-        except Exception as e:
-            logger.error(f"Failed to save config: {e}")
+        """Save device configuration to file.
+
+        Writes to a temporary file and renames it over the config, so a crash
+        never leaves a half-written file behind.
+        """
+        with self._save_lock:
+            try:
+                data = {
+                    "devices": [device.to_dict() for device in self.devices.values()]
+                }
+                payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+                if payload == self._last_serialized:
+                    return
+                tmp_file = f"{self.config_file}.tmp"
+                try:
+                    with open(tmp_file, 'wb') as f:
+                        f.write(payload)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_file, self.config_file)
+                finally:
+                    # Only left behind when the write or rename failed
+                    if os.path.exists(tmp_file):
+                        os.unlink(tmp_file)
+                self._last_serialized = payload
+                logger.info(f"Saved {len(self.devices)} devices to config")
+            except Exception as e:
+                logger.error(f"Failed to save config: {e}")
     
     def add_device(self, identifier: str, name: str, address: str):
         """Add a device to the configuration."""
@@ -130,27 +156,44 @@ class APIClient:
     def __init__(self, base_url: str, api_key: str):
         self.base_url = base_url
         self.api_key = api_key
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use.
+
+        Reusing one session keeps the connection to the API alive between checks.
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=16, keepalive_timeout=75),
+                timeout=aiohttp.ClientTimeout(total=10),
+                headers={"x-api-key": self.api_key}
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the shared session."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
     
     async def _request(self, method: str, path: str, params: Optional[dict] = None) -> Optional[dict]:
         """Make an HTTP request to the API."""
-        headers = {"x-api-key": self.api_key}
-        
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.request(
-                    method, 
-                    f"{self.base_url}{path}", 
-                    headers=headers, 
-                    params=params
-                ) as response:
-                    if response.status >= 400:
-                        text = await response.text()
-                        logger.warning(f"API {method} {path} failed: {response.status} {text}")
-                        return None
-                    
-                    if response.content_type == "application/json":
-                        return await response.json()
-                    return {}
+            session = await self._get_session()
+            async with session.request(
+                method, 
+                f"{self.base_url}{path}", 
+                params=params
+            ) as response:
+                if response.status >= 400:
+                    text = await response.text()
+                    logger.warning(f"API {method} {path} failed: {response.status} {text}")
+                    return None
+                
+                if response.content_type == "application/json":
+                    return await response.json()
+                return {}
         except Exception as e:
             logger.error(f"API request failed: {e}")
             return None
@@ -160,11 +203,10 @@ class APIClient:
         result = await self._request("GET", "/balance")
         return result.get("balance", 0) if result else 0
     
-    async def withdraw_points(self, count: int) -> bool:
-        """Withdraw points from balance, return True if successful."""
+    async def withdraw_points(self, count: int) -> Optional[dict]:
+        """Withdraw points from balance, return the response (with the new balance) or None."""
         params = {"name": "tv_viewing", "count": count}
-        result = await self._request("GET", "/withdraw", params)
-        return result is not None
+        return await self._request("GET", "/withdraw", params)
 
 
 class DeviceMonitor:
@@ -173,24 +215,54 @@ class DeviceMonitor:
     def __init__(self, device_config: DeviceConfig):
         self.config = device_config
         self.atv = None
+        # Scan result of the last successful connect, used to reconnect without scanning
+        self._atv_conf = None
+    
+    @property
+    def needs_scan(self) -> bool:
+        """Whether connecting this device requires a network scan."""
+        return self.atv is None and self._atv_conf is None
+    
+    def _apply_credentials(self, device):
+        """Apply stored credentials to a scanned device configuration."""
+        for service in device.services:
+            proto = service.protocol.name.lower()
+            if proto in self.config.credentials and not service.credentials:
+                service.set_credentials(self.config.credentials[proto])
+        logger.debug(f"Applied credentials for {self.config.name}: {list(self.config.credentials.keys())}")
     
-    async def connect(self) -> bool:
-        """Connect to the Apple TV device."""
+    async def _open(self, device):
+        """Open a connection to a scanned device and watch for disconnects."""
+        self.atv = await connect(device)
+        self.atv.listener = self
+        self._atv_conf = device
+        logger.info(f"Connected to {self.config.name}{' (authenticated)' if self.config.credentials else ''}")
+    
+    async def connect(self, devices: Optional[list] = None) -> bool:
+        """Connect to the Apple TV device.
+
+        Reconnects reuse the last known device configuration and only scan if that fails.
+        devices: results of a recent scan to search; scans the network when omitted.
+        """
+        if self._atv_conf is not None:
+            try:
+                await self._open(self._atv_conf)
+                return True
+            except Exception as e:
+                logger.info(f"Reconnect to {self.config.name} failed, rescanning: {e}")
+                self._atv_conf = None
+        
         try:
-            loop = asyncio.get_running_loop()
-            devices = await scan(loop, timeout=5)
+            if devices is None:
+                loop = asyncio.get_running_loop()
+                devices = await scan(loop, timeout=5)
             for device in devices:
                 if (device.identifier == self.config.identifier or 
                     device.address.exploded == self.config.address):
                     # Apply stored credentials if available
                     if self.config.credentials:
-                        for service in device.services:
-                            proto = service.protocol.name.lower()
-                            if proto in self.config.credentials and not service.credentials:
-                                service.set_credentials(self.config.credentials[proto])
-                        logger.debug(f"Applied credentials for {self.config.name}: {list(self.config.credentials.keys())}")
-                    self.atv = await connect(device)
-                    logger.info(f"Connected to {self.config.name}{' (authenticated)' if self.config.credentials else ''}")
+                        self._apply_credentials(device)
+                    await self._open(device)
                     return True
             
             logger.warning(f"Device {self.config.name} not found")
@@ -200,11 +272,27 @@ class DeviceMonitor:
             logger.error(f"Failed to connect to {self.config.name}: {e}")
             return False
     
+    def _drop_connection(self) -> set:
+        """Forget the current connection and return pyatv's pending close tasks."""
+        atv, self.atv = self.atv, None
+        if atv is None:
+            return set()
+        return atv.close()
+    
     async def disconnect(self):
         """Disconnect from the device."""
-        if self.atv:
-            await self.atv.close()
-            self.atv = None
+        pending = self._drop_connection()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    
+    def connection_lost(self, exception):
+        """pyatv listener callback: the connection dropped unexpectedly."""
+        logger.warning(f"Lost connection to {self.config.name}: {exception}")
+        self.atv = None
+    
+    def connection_closed(self):
+        """pyatv listener callback: the connection was closed."""
+        self.atv = None
     
     async def is_playing(self) -> bool:
         """Check if device is currently playing content."""
@@ -217,7 +305,9 @@ class DeviceMonitor:
             return state == "Playing"
             
         except Exception as e:
-            logger.debug(f"Failed to get playback state for {self.config.name}: {e}")
+            logger.debug("Failed to get playback state for %s: %s", self.config.name, e)
+            # Treat the connection as stale so the next cycle reconnects
+            self._drop_connection()
             return False
     
     async def pause(self):
@@ -238,6 +328,12 @@ class TVConsumer:
         self.api_client = APIClient(SERVER_URL, API_KEY)
         self.monitors: List[DeviceMonitor] = []
         self.running = False
+        # Balance from the last balance check or withdraw response; None when unknown
+        self._last_balance: Optional[int] = None
+        # Consecutive cycles in which no device was playing
+        self._idle_cycles = 0
+        # (monotonic time, devices) of the last network scan
+        self._scan_cache: Optional[tuple] = None
     
     async def list_devices(self):
         """List available Apple TV devices on the network."""
@@ -342,6 +438,48 @@ class TVConsumer:
 
         asyncio.run(_pair())
     
+    def _needs_balance_check(self) -> bool:
+        """Whether this cycle must ask the server for the balance.
+
+        Idle cycles with a healthy balance skip the request; nothing will be charged.
+        """
+        if self._last_balance is None or not self._idle_cycles:
+            return True
+        if self._idle_cycles % IDLE_BALANCE_REFRESH_CYCLES == 0:
+            return True
+        return self._last_balance <= POINTS_PER_CHECK * len(self.monitors)
+    
+    async def _shared_scan(self, timeout: int = 5) -> list:
+        """Scan the network once and reuse the results for SCAN_CACHE_TTL seconds."""
+        now = time.monotonic()
+        if self._scan_cache is not None and now - self._scan_cache[0] < SCAN_CACHE_TTL:
+            return self._scan_cache[1]
+        loop = asyncio.get_running_loop()
+        devices = await scan(loop, timeout=timeout)
+        self._scan_cache = (now, devices)
+        return devices
+    
+    async def _check_monitor(self, monitor: DeviceMonitor, devices: Optional[list] = None) -> bool:
+        """Connect to the device if needed and report whether it is playing."""
+        if not monitor.atv:
+            await monitor.connect(devices=devices)
+        return await monitor.is_playing()
+    
+    async def _pause_all(self):
+        """Pause all connected devices concurrently."""
+        await asyncio.gather(*(monitor.pause() for monitor in self.monitors if monitor.atv))
+    
+    @staticmethod
+    def _next_tick_delay(loop: asyncio.AbstractEventLoop, next_tick: float) -> tuple:
+        """Advance the fixed-period schedule; return (next_tick, seconds to sleep)."""
+        next_tick += CHECK_INTERVAL
+        delay = next_tick - loop.time()
+        if delay <= 0:
+            # Running behind: skip the missed ticks instead of bursting to catch up
+            logger.warning("Monitoring cycle overran the check interval")
+            return loop.time(), 0
+        return next_tick, delay
+    
     async def run_monitoring(self):
         """Main monitoring loop - check devices and charge points."""
         if not self.device_manager.devices:
@@ -365,44 +503,61 @@ class TVConsumer:
             loop.add_signal_handler(sig, signal_handler)
         
         try:
+            # Cycles start on fixed boundaries so the work time doesn't add drift
+            next_tick = loop.time()
             while self.running:
-                # Check balance first
-                balance = await self.api_client.get_balance()
-                logger.info(f"Current balance: {balance} points")
+                # Check balance first (skipped while idle with a healthy balance)
+                if self._needs_balance_check():
+                    self._last_balance = await self.api_client.get_balance()
+                    logger.info("Current balance: %s points", self._last_balance)
+                balance = self._last_balance
                 
                 if balance <= 0:
                     logger.warning("No balance! Pausing all devices...")
-                    for monitor in self.monitors:
-                        if monitor.atv:
-                            await monitor.pause()
-                    await asyncio.sleep(CHECK_INTERVAL)
+                    await self._pause_all()
+                    next_tick, delay = self._next_tick_delay(loop, next_tick)
+                    await asyncio.sleep(delay)
                     continue
                 
-                # Check each device
+                # One shared scan serves every device that has never connected
+                devices = None
+                if any(monitor.needs_scan for monitor in self.monitors):
+                    try:
+                        devices = await self._shared_scan()
+                    except Exception as e:
+                        logger.error("Failed to scan for devices: %s", e)
+                
+                # Check all devices concurrently
+                results = await asyncio.gather(
+                    *(self._check_monitor(monitor, devices) for monitor in self.monitors),
+                    return_exceptions=True
+                )
                 playing_devices = []
-                for monitor in self.monitors:
-                    # Connect if needed
-                    if not monitor.atv:
-                        await monitor.connect()
-                    
-                    # Check if playing
-                    if await monitor.is_playing():
+                for monitor, result in zip(self.monitors, results):
+                    if isinstance(result, Exception):
+                        logger.warning("Check failed for %s: %s", monitor.config.name, result)
+                    elif result:
                         playing_devices.append(monitor.config.name)
                 
+                self._idle_cycles = 0 if playing_devices else self._idle_cycles + 1
+                
                 # Charge points for playing devices
                 if playing_devices:
                     total_charge = len(playing_devices) * POINTS_PER_CHECK
-                    logger.info(f"Playing devices: {', '.join(playing_devices)}")
+                    logger.info("Playing devices: %s", ", ".join(playing_devices))
                     
-                    if await self.api_client.withdraw_points(total_charge):
-                        logger.info(f"Charged {total_charge} points")
+                    result = await self.api_client.withdraw_points(total_charge)
+                    if result is not None:
+                        # The withdraw response carries the new balance; no extra GET needed
+                        self._last_balance = result.get("balance")
+                        logger.info("Charged %s points, balance: %s", total_charge, self._last_balance)
                     else:
+                        self._last_balance = None
                         logger.warning("Failed to charge points - pausing all devices")
-                        for monitor in self.monitors:
-                            if monitor.atv:
-                                await monitor.pause()
+                        await self._pause_all()
                 
-                await asyncio.sleep(CHECK_INTERVAL)
+                next_tick, delay = self._next_tick_delay(loop, next_tick)
+                await asyncio.sleep(delay)
                 
         except KeyboardInterrupt:
             logger.info("Interrupted by user")
@@ -411,6 +566,7 @@ class TVConsumer:
             logger.info("Shutting down...")
             for monitor in self.monitors:
                 await monitor.disconnect()
+            await self.api_client.close()
 
 
 def main():
@@ -4,7 +4,8 @@ import os
 import uvicorn
 import httpx
 import asyncio
-from fastapi import FastAPI, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, Query, BackgroundTasks, Request, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 from typing import Optional
@@ -21,6 +22,91 @@ LOW_BALANCE_THRESHOLD = int(os.getenv("LOW_BALANCE_THRESHOLD", "50"))  # points
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_API_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}" if TELEGRAM_BOT_TOKEN else None
 
+# Deletes Markdown emphasis markers for the plain-text fallback
+_MD_STRIP = str.maketrans('', '', '*_')
+
+# Telegram allows ~30 messages/sec per bot; broadcasts are paced safely below that
+TELEGRAM_MESSAGES_PER_SECOND = 25
+
+
+class SendPacer:
+    """Spaces out message sends so they stay under a messages-per-second rate.
+    
+    Create one per broadcast, inside the running event loop.
+    """
+    
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.next_slot = 0.0
+    
+    async def wait(self):
+        """Wait for the next free send slot."""
+        now = asyncio.get_running_loop().time()
+        # Reserve the slot before sleeping so concurrent callers queue up behind it
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def _epoch_seconds(dt: datetime) -> int:
+    """Convert a stored timestamp to Unix seconds; naive values are UTC."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def _resolve_bound(date: Optional[datetime], ts: Optional[int]) -> Optional[datetime]:
+    """Pick a date filter bound, preferring epoch seconds over the ISO form."""
+    if ts is not None:
+        return datetime.fromtimestamp(ts, timezone.utc)
+    return date
+
+
+async def _paced_send(client: httpx.AsyncClient, pacer: SendPacer, payload: dict) -> httpx.Response:
+    """Send a Telegram message once the pacer allows it."""
+    await pacer.wait()
+    return await client.post(
+        f"{TELEGRAM_API_URL}/sendMessage",
+        json=payload,
+        timeout=10.0
+    )
+
+async def _notify_chat(client: httpx.AsyncClient, pacer: SendPacer, chat_id: int, message: str) -> bool:
+    """Send a notification to one chat, falling back to plain text. Returns True on success."""
+    try:
+        response = await _paced_send(client, pacer, {
+            "chat_id": chat_id,
+            "text": message,
+            "parse_mode": "Markdown"
+        })
+        
+        if response.status_code == 200:
+            print(f"Low balance notification sent to chat {chat_id}")
+            return True
+        if response.status_code == 429:
+            # Flood limit hit - retrying without markdown would only make it worse
+            print(f"Rate limited by Telegram while notifying chat {chat_id}: HTTP 429")
+            return False
+        
+        print(f"Failed to send low balance notification to chat {chat_id}: HTTP {response.status_code}")
+        
+        # Try without markdown as fallback
+        fallback_message = message.translate(_MD_STRIP)
+        fallback_response = await _paced_send(client, pacer, {
+            "chat_id": chat_id,
+            "text": fallback_message
+        })
+        
+        if fallback_response.status_code == 200:
+            print(f"Low balance notification sent to chat {chat_id} (fallback)")
+            return True
+        return False
+        
+    except Exception as e:
+        print(f"Error sending low balance notification to chat {chat_id}: {e}")
+        return False
+
 async def send_low_balance_notification(current_balance: int, db: Session):
     """Send low balance notification to all registered chats."""
     if not TELEGRAM_BOT_TOKEN:
@@ -38,44 +124,15 @@ async def send_low_balance_notification(current_balance: int, db: Session):
         # Create the notification message
         message = f"⚠️ **Low Balance Alert** ⚠️\n\n💰 Current Balance: **{current_balance}** points\n📉 Below threshold of {LOW_BALANCE_THRESHOLD} points\n\n💪 Time to earn some more points!"
         
-        # Send to each registered chat
-        successful_sends = 0
+        # Send to all registered chats concurrently; the pacer keeps the
+        # broadcast (fallback resends included) under Telegram's rate limit
+        pacer = SendPacer(TELEGRAM_MESSAGES_PER_SECOND)
         async with httpx.AsyncClient() as client:
-            for chat in registered_chats:
-                try:
-                    response = await client.post(
-                        f"{TELEGRAM_API_URL}/sendMessage",
-                        json={
-                            "chat_id": chat.chat_id,
-                            "text": message,
-                            "parse_mode": "Markdown"
-                        },
-                        timeout=10.0
-                    )
-                    
-                    if response.status_code == 200:
-                        successful_sends += 1
-                        print(f"Low balance notification sent to chat {chat.chat_id}")
-                    else:
-                        print(f"Failed to send low balance notification to chat {chat.chat_id}: HTTP {response.status_code}")
-                        
-                        # Try without markdown as fallback
-                        fallback_message = message.replace('*', '').replace('_', '')
-                        fallback_response = await client.post(
-                            f"{TELEGRAM_API_URL}/sendMessage",
-                            json={
-                                "chat_id": chat.chat_id,
-                                "text": fallback_message
-                            },
-                            timeout=10.0
-                        )
-                        
-                        if fallback_response.status_code == 200:
-                            successful_sends += 1
-                            print(f"Low balance notification sent to chat {chat.chat_id} (fallback)")
-                        
-                except Exception as e:
-                    print(f"Error sending low balance notification to chat {chat.chat_id}: {e}")
+            results = await asyncio.gather(
+                *(_notify_chat(client, pacer, chat.chat_id, message) for chat in registered_chats),
+                return_exceptions=True
+            )
+        successful_sends = sum(1 for result in results if result is True)
         
         print(f"Low balance notification sent to {successful_sends}/{len(registered_chats)} registered chats")
         
@@ -113,6 +170,8 @@ app = FastAPI(
 
 @app.get("/balance", tags=["Balance"])
 def get_balance(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     api_key: str = Depends(verify_api_key)
 ):
@@ -121,9 +180,16 @@ def get_balance(
     if not balance:
         return {"balance": 0, "message": "No balance record found"}
     
+    last_updated = balance.updated_at.isoformat()
+    # Pollers send the ETag back and get an empty 304 while nothing changed
+    etag = f'"{balance.total_points}-{last_updated}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    
     return {
         "balance": balance.total_points,
-        "last_updated": balance.updated_at.isoformat()
+        "last_updated": last_updated
     }
 
 
@@ -224,11 +290,15 @@ def get_transactions(
     type: Optional[str] = Query(None, description="Filter by transaction type: 'deposit' or 'withdraw'."),
     start_date: Optional[datetime] = Query(None, description="Start date for filtering transactions (ISO format)."),
     end_date: Optional[datetime] = Query(None, description="End date for filtering transactions (ISO format)."),
+    start_ts: Optional[int] = Query(None, description="Start of the filter window in Unix epoch seconds; overrides start_date."),
+    end_ts: Optional[int] = Query(None, description="End of the filter window in Unix epoch seconds; overrides end_date."),
     db: Session = Depends(get_db),
     api_key: str = Depends(verify_api_key)
 ):
     """Returns recent transactions with optional filtering."""
     query = db.query(Transaction).order_by(Transaction.timestamp.desc())
+    start_date = _resolve_bound(start_date, start_ts)
+    end_date = _resolve_bound(end_date, end_ts)
     
     if type and type in ["deposit", "withdraw"]:
         query = query.filter(Transaction.type == type)
@@ -246,6 +316,7 @@ def get_transactions(
         transaction_list.append({
             "id": t.id,
             "timestamp": t.timestamp.isoformat(),
+            "timestamp_epoch": _epoch_seconds(t.timestamp),
             "type": t.type,
             "name": t.name,
             "count": t.count,
@@ -256,6 +327,43 @@ def get_transactions(
     return transaction_list
 
 
+@app.get("/transactions/summary", tags=["Balance"])
+def get_transaction_summary(
+    start_date: Optional[datetime] = Query(None, description="Start date for the summary window (ISO format)."),
+    end_date: Optional[datetime] = Query(None, description="Exclusive end date for the summary window (ISO format)."),
+    start_ts: Optional[int] = Query(None, description="Start of the summary window in Unix epoch seconds; overrides start_date."),
+    end_ts: Optional[int] = Query(None, description="Exclusive end of the summary window in Unix epoch seconds; overrides end_date."),
+    db: Session = Depends(get_db),
+    api_key: str = Depends(verify_api_key)
+):
+    """Returns point totals grouped by activity name and transaction type."""
+    start_date = _resolve_bound(start_date, start_ts)
+    end_date = _resolve_bound(end_date, end_ts)
+    query = db.query(
+        Transaction.name,
+        Transaction.type,
+        func.sum(Transaction.count).label("count")
+    )
+    
+    if start_date:
+        query = query.filter(Transaction.timestamp >= start_date)
+    
+    if end_date:
+        query = query.filter(Transaction.timestamp < end_date)
+    
+    # Most recently active names first, matching the /transactions ordering
+    rows = (
+        query.group_by(Transaction.name, Transaction.type)
+        .order_by(func.max(Transaction.timestamp).desc())
+        .all()
+    )
+    
+    return [
+        {"name": name, "type": trans_type, "count": count}
+        for name, trans_type, count in rows
+    ]
+
+
 @app.post("/register_chat", tags=["Telegram"])
 def register_chat(
     chat_id: int = Query(..., description="Telegram chat ID"),
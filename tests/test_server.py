@@ -125,6 +125,25 @@ class TestBalanceEndpoint:
         assert data["balance"] == 100
         assert "last_updated" in data
     
+    def test_get_balance_etag_not_modified(self, client, auth_headers, db_session):
+        """Test that a matching If-None-Match returns 304 until the balance changes."""
+        balance = Balance(total_points=100)
+        db_session.add(balance)
+        db_session.commit()
+        
+        response = client.get("/balance", headers=auth_headers)
+        etag = response.headers["ETag"]
+        
+        response = client.get("/balance", headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        
+        client.get("/deposit", params={"name": "workout", "count": 5}, headers=auth_headers)
+        response = client.get("/balance", headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["balance"] == 105
+        assert response.headers["ETag"] != etag
+    
     def test_get_balance_not_exists(self, client, auth_headers):
         """Test getting balance when it doesn't exist."""
         response = client.get("/balance", headers=auth_headers)
@@ -301,6 +320,8 @@ class TestTransactionsEndpoint:
         
         # Should be ordered by timestamp descending
         assert transactions[0]["timestamp"] > transactions[1]["timestamp"]
+        # Stored timestamps are UTC; 2024-01-15T13:00:00Z
+        assert transactions[0]["timestamp_epoch"] == 1705323600
     
     def test_get_transactions_with_limit(self, client, auth_headers, db_session):
         """Test getting transactions with limit."""
@@ -344,6 +365,96 @@ class TestTransactionsEndpoint:
         assert transactions == []
 
 
+class TestTransactionSummaryEndpoint:
+    """Test the /transactions/summary endpoint."""
+    
+    def setup_sample_transactions(self, db_session):
+        """Create sample transaction data spanning two days."""
+        transactions = [
+            Transaction(type="deposit", name="workout", count=10, balance_after=10, 
+                       timestamp=datetime(2024, 1, 15, 10, 0, 0)),
+            Transaction(type="deposit", name="workout", count=15, balance_after=25, 
+                       timestamp=datetime(2024, 1, 15, 11, 0, 0)),
+            Transaction(type="withdraw", name="workout", count=5, balance_after=20, 
+                       timestamp=datetime(2024, 1, 15, 12, 0, 0)),
+            Transaction(type="withdraw", name="tv", count=8, balance_after=12, 
+                       timestamp=datetime(2024, 1, 15, 13, 0, 0)),
+            Transaction(type="deposit", name="bonus", count=50, balance_after=62, 
+                       timestamp=datetime(2024, 1, 16, 9, 0, 0)),
+        ]
+        
+        for transaction in transactions:
+            db_session.add(transaction)
+        db_session.commit()
+    
+    def test_summary_groups_by_name_and_type(self, client, auth_headers, db_session):
+        """Test that counts are summed per activity name and type."""
+        self.setup_sample_transactions(db_session)
+        
+        params = {
+            "start_date": "2024-01-15T00:00:00",
+            "end_date": "2024-01-16T00:00:00"
+        }
+        response = client.get("/transactions/summary", params=params, headers=auth_headers)
+        
+        assert response.status_code == 200
+        rows = {(r["name"], r["type"]): r["count"] for r in response.json()}
+        assert rows == {
+            ("workout", "deposit"): 25,
+            ("workout", "withdraw"): 5,
+            ("tv", "withdraw"): 8,
+        }
+    
+    def test_summary_end_date_is_exclusive(self, client, auth_headers, db_session):
+        """Test that a transaction exactly at end_date belongs to the next window."""
+        db_session.add(Transaction(type="deposit", name="midnight", count=7, balance_after=7,
+                                   timestamp=datetime(2024, 1, 16, 0, 0, 0)))
+        db_session.commit()
+        
+        params = {
+            "start_date": "2024-01-15T00:00:00",
+            "end_date": "2024-01-16T00:00:00"
+        }
+        response = client.get("/transactions/summary", params=params, headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert response.json() == []
+    
+    def test_summary_epoch_bounds_override_iso(self, client, auth_headers, db_session):
+        """Test that start_ts/end_ts take precedence over start_date/end_date."""
+        self.setup_sample_transactions(db_session)
+        
+        params = {
+            "start_date": "2024-01-15T00:00:00",
+            "end_date": "2024-01-16T00:00:00",
+            # 2024-01-16T00:00:00Z to 2024-01-17T00:00:00Z
+            "start_ts": 1705363200,
+            "end_ts": 1705449600
+        }
+        response = client.get("/transactions/summary", params=params, headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert response.json() == [{"name": "bonus", "type": "deposit", "count": 50}]
+    
+    def test_summary_ordered_by_most_recent_activity(self, client, auth_headers, db_session):
+        """Test that the most recently active names come first."""
+        self.setup_sample_transactions(db_session)
+        
+        response = client.get("/transactions/summary", headers=auth_headers)
+        
+        assert response.status_code == 200
+        names = [r["name"] for r in response.json()]
+        assert names[0] == "bonus"
+        assert names[1] == "tv"
+    
+    def test_summary_no_data(self, client, auth_headers):
+        """Test the summary when no transactions exist."""
+        response = client.get("/transactions/summary", headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert response.json() == []
+
+
 class TestHealthEndpoint:
     """Test the /health endpoint."""
     
@@ -434,6 +545,64 @@ class TestIntegrationScenarios:
         assert timestamps[0] > timestamps[1]  # First transaction is newer
 
 
+class TestLowBalanceNotification:
+    """Test the low balance notification broadcast."""
+    
+    def test_notifies_all_chats_with_fallback(self, db_session, mocker, capsys):
+        """Test that every chat is notified and failed Markdown sends fall back to plain text."""
+        import asyncio
+        from fitness_rewards import main
+        
+        for chat_id in (1, 2, 3):
+            db_session.add(ChatRegistration(chat_id=chat_id))
+        db_session.commit()
+        
+        sent = []
+        
+        async def fake_send(client, pacer, payload):
+            sent.append(payload)
+            # Chat 2 rejects Markdown, chat 3 is rate limited
+            if payload["chat_id"] == 2 and "parse_mode" in payload:
+                return mocker.Mock(status_code=400)
+            if payload["chat_id"] == 3:
+                return mocker.Mock(status_code=429)
+            return mocker.Mock(status_code=200)
+        
+        mocker.patch.object(main, "TELEGRAM_BOT_TOKEN", "test-token")
+        mocker.patch.object(main, "_paced_send", side_effect=fake_send)
+        
+        asyncio.run(main.send_low_balance_notification(10, db_session))
+        
+        # Chat 2 gets a plain-text retry, chat 3 (429) does not
+        assert sorted(p["chat_id"] for p in sent) == [1, 2, 2, 3]
+        fallback = [p for p in sent if p["chat_id"] == 2 and "parse_mode" not in p][0]
+        assert "*" not in fallback["text"]
+        assert "sent to 2/3 registered chats" in capsys.readouterr().out
+    
+    def test_send_pacer_spaces_out_sends(self):
+        """Test that concurrent sends are spread over time at the configured rate."""
+        import asyncio
+        from fitness_rewards.main import SendPacer
+        
+        async def run():
+            pacer = SendPacer(rate=50)
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            times = []
+            
+            async def send():
+                await pacer.wait()
+                times.append(loop.time() - start)
+            
+            await asyncio.gather(*(send() for _ in range(4)))
+            return sorted(times)
+        
+        times = asyncio.run(run())
+        # The first send goes out immediately, the rest at 20ms intervals
+        assert times[0] < 0.01
+        assert times[3] >= 0.059
+
+
 class TestErrorHandling:
     """Test error handling and edge cases."""
     
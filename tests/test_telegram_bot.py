@@ -0,0 +1,92 @@
+"""
+Tests for the Telegram bot's MarkdownV2 message chunking.
+
+Chunks are sent with parse_mode='MarkdownV2' and no plain-text fallback, so
+every chunk must be valid on its own: no chunk may end after a lone escape
+backslash or inside an open bold/italic entity.
+"""
+
+import os
+
+import pytest
+
+# The bot refuses to import without a token
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:test-token")
+
+from clients.telegram_bot import escape_markdown_v2, iter_message_chunks
+
+
+def assert_valid_chunk(chunk: str):
+    """Fail if a chunk ends mid-escape or leaves a */_ entity open."""
+    open_markers = 0
+    pos = 0
+    while pos < len(chunk):
+        if chunk[pos] == '\\':
+            assert pos + 1 < len(chunk), f"chunk ends with a lone backslash: {chunk[-10:]!r}"
+            pos += 2
+            continue
+        if chunk[pos] in '*_':
+            open_markers += 1
+        pos += 1
+    assert open_markers % 2 == 0, f"chunk leaves an entity open: {chunk!r}"
+
+
+def split(text: str, limit: int) -> list:
+    """Split text and check the invariants every caller relies on."""
+    chunks = list(iter_message_chunks(text, limit))
+    assert "".join(chunks) == text
+    for chunk in chunks:
+        assert 0 < len(chunk) <= limit
+        assert_valid_chunk(chunk)
+    return chunks
+
+
+class TestIterMessageChunks:
+    """Test splitting of long MarkdownV2 messages."""
+
+    def test_short_text_is_one_chunk(self):
+        """Test that text within the limit is yielded unchanged."""
+        assert split("*5* puan \\- Koşu\n", 100) == ["*5* puan \\- Koşu\n"]
+
+    def test_prefers_blank_line_boundaries(self):
+        """Test that chunks end between entries, not inside one."""
+        entry = "➖ *1* puan \\- TV\n   ⏰ 01/01 10:00 \\| Bakiye: 5\n\n"
+        chunks = split(entry * 10, len(entry) * 3 + 5)
+        assert all(chunk.endswith("\n\n") for chunk in chunks)
+        assert len(chunks) == 4
+
+    def test_falls_back_to_line_break(self):
+        """Test that an entry longer than the limit is split at a line break."""
+        text = "a" * 30 + "\n" + "b" * 30 + "\n"
+        assert split(text, 40) == ["a" * 30 + "\n", "b" * 30 + "\n"]
+
+    def test_long_single_line_of_escapes(self):
+        """Test that a line made only of escape pairs never splits a pair."""
+        line = escape_markdown_v2("." * 2500)
+        for limit in (999, 1000, 1001):
+            chunks = split(line, limit)
+            assert len(chunks) > 1
+
+    @pytest.mark.parametrize("offset", range(4))
+    def test_escape_pair_on_the_boundary(self, offset):
+        """Test cut points falling on each side of an escape pair."""
+        text = "x" * (10 + offset) + "\\." + "y" * 20
+        chunks = split(text, 11)
+        assert not any(chunk.endswith("\\") for chunk in chunks)
+
+    def test_bold_span_crossing_the_limit(self):
+        """Test that a chunk ends before a bold span that would cross the limit."""
+        text = "x" * 8 + " *123456* " + "y" * 8
+        chunks = split(text, 12)
+        assert chunks[0] == "x" * 8 + " "
+        assert chunks[1].startswith("*123456*")
+
+    def test_long_activity_name_in_transactions(self):
+        """Test the /transactions layout with an escaped name longer than a message."""
+        entry = (
+            f"➖ *30* puan \\- {escape_markdown_v2('.' * 2500)}\n"
+            "   ⏰ 01/01 10:00 \\| Bakiye: 5\n\n"
+        )
+        text = "📋 *Son İşlemler \\(Son 2\\):*\n\n" + entry + "➕ *1* puan \\- Koşu\n\n"
+        chunks = split(text, 4000)
+        assert len(chunks) == 3